@@ -2,9 +2,11 @@ import os
 import re
 import sys
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from typing import Dict, List, Optional, Tuple
 
-from bs4 import BeautifulSoup
+import lxml.html
 from openpyxl import load_workbook
 
 DOCS_DIR = os.path.join(os.path.dirname(__file__), "..", "docs")
@@ -16,59 +18,93 @@ TEAM_NAMES_XLSX = os.path.join(DOCS_DIR, "Team_Names.xlsx")
 OUT_PLAYER = os.path.join(DOCS_DIR, "Player_Pooh_Summary.html")
 OUT_BY_TEAM = os.path.join(DOCS_DIR, "Pooh_Summary_By_Team.html")
 
+# Final_* pages are written by python_today_pooh.py as UTF-8
+HTML_PARSER = lxml.html.HTMLParser(encoding="utf-8")
+
 # ----------------------------
 # Helpers
 # ----------------------------
+_NON_WORD = re.compile(r"[^\w\s]")
+_SUFFIX   = re.compile(r"\b(?:jr|sr|ii|iii|iv)\b")
+_WS       = re.compile(r"\s+")
+_FINAL_PD = re.compile(r"Final_Players_PD(\d+)\.html$")
+_CAP      = re.compile(r"PD(\d+)")
+
 def parse_cap_pd(argv) -> Optional[int]:
     # optional arg: PD7
     if len(argv) < 2:
         return None
     s = argv[1].strip().upper()
-    m = re.fullmatch(r"PD(\d+)", s)
+    m = _CAP.fullmatch(s)
     if not m:
         raise SystemExit("Usage: python app/build_player_pooh_summary.py [PD7]")
     return int(m.group(1))
 
 def pd_num_from_filename(fn: str) -> Optional[int]:
-    m = re.search(r"Final_Players_PD(\d+)\.html$", fn)
+    m = _FINAL_PD.search(fn)
     return int(m.group(1)) if m else None
 
+@lru_cache(maxsize=4096)  # same names recur in every PD file + the roster
 def norm_name(name: str) -> str:
     s = (name or "").lower()
-    s = re.sub(r"[^\w\s]", " ", s)
-    s = re.sub(r"\b(jr|sr|ii|iii|iv)\b", " ", s)
-    s = re.sub(r"\s+", " ", s).strip()
+    s = _NON_WORD.sub(" ", s)
+    s = _SUFFIX.sub(" ", s)
+    s = _WS.sub(" ", s).strip()
     return s
 
 def safe_int(x) -> int:
+    # table cells arrive as stripped strings; int()/float() accept them as-is
+    if isinstance(x, str):
+        if not x:
+            return 0
+        try:
+            return int(x)
+        except ValueError:
+            try:
+                return int(float(x))
+            except (ValueError, OverflowError):
+                return 0
     try:
         return int(str(x).strip())
     except:
         return 0
 
 def safe_float(x) -> float:
+    if isinstance(x, str):
+        if not x:
+            return 0.0
+        try:
+            return float(x)
+        except ValueError:
+            return 0.0
     try:
         return float(str(x).strip())
     except:
         return 0.0
 
+def cell_text(el) -> str:
+    # same as BeautifulSoup get_text(strip=True): strip each text piece, then join
+    return "".join(t.strip() for t in el.itertext())
+
 def html_read_table(path: str) -> Tuple[List[str], List[List[str]]]:
-    with open(path, "r", encoding="utf-8") as f:
-        soup = BeautifulSoup(f.read(), "html.parser")
+    # lxml directly: tree is built in C and cells are read without BeautifulSoup wrappers
+    root = lxml.html.parse(path, parser=HTML_PARSER).getroot()
+    if root is None:
+        return [], []
 
-    table = soup.find("table")
-    if not table:
+    table = root.find(".//table")
+    if table is None:
         return [], []
 
-    headers = [th.get_text(strip=True) for th in table.find_all("th")]
+    headers = [cell_text(th) for th in table.xpath(".//th")]
     headers_l = [h.lower() for h in headers]
 
     rows = []
-    for tr in table.find_all("tr")[1:]:
-        tds = tr.find_all("td")
+    for tr in table.xpath(".//tr")[1:]:
+        tds = tr.xpath(".//td")
         if not tds:
             continue
-        rows.append([td.get_text(strip=True) for td in tds])
+        rows.append([cell_text(td) for td in tds])
 
     return headers_l, rows
 
@@ -91,10 +127,11 @@ def load_team_name_map() -> Dict[str, str]:
         print(f"NOTE: Missing {TEAM_NAMES_XLSX}. Using names as-is.")
         return {}
 
-    wb = load_workbook(TEAM_NAMES_XLSX, data_only=True)
+    wb = load_workbook(TEAM_NAMES_XLSX, data_only=True, read_only=True)
     ws = wb.active
 
-    headers = [("" if c.value is None else str(c.value).strip()) for c in ws[1]]
+    header_row = next(ws.iter_rows(min_row=1, max_row=1, values_only=True), ())
+    headers = [("" if v is None else str(v).strip()) for v in header_row]
     headers_l = [h.lower() for h in headers]
 
     def col(name: str) -> Optional[int]:
@@ -106,17 +143,23 @@ def load_team_name_map() -> Dict[str, str]:
     c_owner = col("Owner")
     c_team  = col("Team Name")
     if not c_owner or not c_team:
+        wb.close()
         raise SystemExit("ERROR: docs/Team_Names.xlsx must have headers: Owner, Team Name")
 
+    # one pass over row tuples (0-based) instead of a ws.cell() lookup per value
+    i_owner = c_owner - 1
+    i_team  = c_team - 1
+
     m: Dict[str, str] = {}
-    for r in range(2, ws.max_row + 1):
-        old = ws.cell(row=r, column=c_owner).value
-        new = ws.cell(row=r, column=c_team).value
+    for row in ws.iter_rows(min_row=2, values_only=True):
+        old = row[i_owner] if i_owner < len(row) else None
+        new = row[i_team] if i_team < len(row) else None
         old_s = "" if old is None else str(old).strip()
         new_s = "" if new is None else str(new).strip()
         if old_s and new_s:
             m[old_s] = new_s
 
+    wb.close()
     return m
 
 def display_team(name: str, team_map: Dict[str, str]) -> str:
@@ -139,10 +182,11 @@ def load_rosters(team_map: Dict[str, str]) -> Dict[str, dict]:
     if not os.path.exists(ROSTERS_XLSX):
         raise SystemExit(f"ERROR: Missing {ROSTERS_XLSX}")
 
-    wb = load_workbook(ROSTERS_XLSX, data_only=True)
+    wb = load_workbook(ROSTERS_XLSX, data_only=True, read_only=True)
     ws = wb.active
 
-    headers = [("" if c.value is None else str(c.value).strip()) for c in ws[1]]
+    header_row = next(ws.iter_rows(min_row=1, max_row=1, values_only=True), ())
+    headers = [("" if v is None else str(v).strip()) for v in header_row]
     headers_l = [h.lower() for h in headers]
 
     def col(*cands):
@@ -153,6 +197,7 @@ def load_rosters(team_map: Dict[str, str]) -> Dict[str, dict]:
 
     c_name = col("name", "player")
     if not c_name:
+        wb.close()
         raise SystemExit("ERROR: rosters.xlsx must have a 'Name' column.")
 
     c_cost   = col("cost")
@@ -163,14 +208,14 @@ def load_rosters(team_map: Dict[str, str]) -> Dict[str, dict]:
     c_class  = col("class")
     c_pos    = col("position", "pos")
 
-    def sval(r: int, c: Optional[int]) -> str:
-        if c is None:
+    def sval(r: tuple, c: Optional[int]) -> str:
+        if c is None or c > len(r):
             return ""
-        v = ws.cell(row=r, column=c).value
+        v = r[c - 1]
         return "" if v is None else str(v).strip()
 
     out: Dict[str, dict] = {}
-    for r in range(2, ws.max_row + 1):
+    for r in ws.iter_rows(min_row=2, values_only=True):
         name = sval(r, c_name)
         if not name:
             continue
@@ -190,6 +235,7 @@ def load_rosters(team_map: Dict[str, str]) -> Dict[str, dict]:
             "Position": sval(r, c_pos),
         }
 
+    wb.close()
     return out
 
 # ----------------------------
@@ -206,13 +252,17 @@ def load_final_player_data(cap_pd: Optional[int], team_map: Dict[str, str]):
       owner_by_player[player_norm] = DISPLAY team name (mapped)
     """
     files = []
-    for fn in os.listdir(DOCS_DIR):
-        n = pd_num_from_filename(fn)
-        if n is None:
-            continue
-        if cap_pd is not None and n > cap_pd:
-            continue
-        files.append((n, fn))
+    with os.scandir(DOCS_DIR) as it:
+        for entry in it:
+            fn = entry.name
+            if not fn.startswith("Final_Players_PD") or not entry.is_file():
+                continue
+            n = pd_num_from_filename(fn)
+            if n is None:
+                continue
+            if cap_pd is not None and n > cap_pd:
+                continue
+            files.append((n, entry.path))
     files.sort(key=lambda x: x[0])
 
     if not files:
@@ -226,9 +276,13 @@ def load_final_player_data(cap_pd: Optional[int], team_map: Dict[str, str]):
     agg = defaultdict(lambda: {"games": 0, "min": 0.0, "pts": 0, "reb": 0, "ast": 0, "stl": 0, "blk": 0, "to": 0})
     owner_by_player: Dict[str, str] = {}
 
-    for pd, fn in files:
-        path = os.path.join(DOCS_DIR, fn)
-        headers_l, rows = html_read_table(path)
+    # each PD file parses independently, so spread the parsing across cores
+    # and merge the results here in order
+    paths = [path for _, path in files]
+    with ProcessPoolExecutor() as ex:
+        parsed = list(ex.map(html_read_table, paths, chunksize=1))
+
+    for (pd, _), (headers_l, rows) in zip(files, parsed):
         if not headers_l or not rows:
             continue
 
@@ -291,36 +345,37 @@ def load_final_player_data(cap_pd: Optional[int], team_map: Dict[str, str]):
 NUM_COLS = {"Cost", "Min/G", "Avg", "Total", "PPG", "R/G", "A/G", "B/G", "S/G", "T/G"}
 
 def write_html(out_path: str, cols: List[str], rows: List[Dict[str, str]], title: str):
-    with open(out_path, "w", encoding="utf-8") as out:
-        out.write("<!doctype html><html><head><meta charset='utf-8'>")
-        out.write(f"<title>{title}</title>")
-        out.write(
-            "<style>"
-            "body{font-family:Arial}"
-            "table{border-collapse:collapse;font-size:14px}"
-            "th,td{border:1px solid #ccc;padding:4px 6px}"
-            "th{background:#eee}"
-            "td.num{text-align:right}"
-            "</style>"
-        )
-        out.write("</head><body>")
-        out.write(f"<h2 style='text-align:center'>{title}</h2>")
-
-        out.write("<table><thead><tr>")
-        for c in cols:
-            out.write(f"<th>{c}</th>")
-        out.write("</tr></thead><tbody>")
+    # the td opening tag only depends on the column, so decide it once per column
+    td_open = ["<td class='num'>" if (c in NUM_COLS or c.isdigit()) else "<td>" for c in cols]
+
+    parts: List[str] = []
+    add = parts.append
+
+    add("<!doctype html><html><head><meta charset='utf-8'>")
+    add(f"<title>{title}</title>")
+    add(
+        "<style>"
+        "body{font-family:Arial}"
+        "table{border-collapse:collapse;font-size:14px}"
+        "th,td{border:1px solid #ccc;padding:4px 6px}"
+        "th{background:#eee}"
+        "td.num{text-align:right}"
+        "</style>"
+    )
+    add("</head><body>")
+    add(f"<h2 style='text-align:center'>{title}</h2>")
 
-        for r in rows:
-            out.write("<tr>")
-            for c in cols:
-                v = r.get(c, "")
-                is_num = (c in NUM_COLS) or c.isdigit()
-                cls = " class='num'" if is_num else ""
-                out.write(f"<td{cls}>{v}</td>")
-            out.write("</tr>")
-
-        out.write("</tbody></table></body></html>")
+    add("<table><thead><tr>")
+    add("".join(f"<th>{c}</th>" for c in cols))
+    add("</tr></thead><tbody>")
+
+    for r in rows:
+        add("<tr>" + "".join([f"{td}{r.get(c, '')}</td>" for c, td in zip(cols, td_open)]) + "</tr>")
+
+    add("</tbody></table></body></html>")
+
+    with open(out_path, "wb") as out:
+        out.write("".join(parts).encode("utf-8"))
 
     print(f"Wrote: {out_path}")
 
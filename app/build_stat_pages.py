@@ -144,10 +144,11 @@ def load_team_name_map() -> Dict[str, str]:
         print(f"NOTE: Missing {TEAM_NAMES_XLSX}. Team Name will display as-is.")
         return {}
 
-    wb = load_workbook(TEAM_NAMES_XLSX, data_only=True)
+    wb = load_workbook(TEAM_NAMES_XLSX, data_only=True, read_only=True)
     ws = wb.active
+    rows_iter = ws.iter_rows(values_only=True)
 
-    headers = [("" if c.value is None else str(c.value).strip()) for c in ws[1]]
+    headers = [("" if v is None else str(v).strip()) for v in next(rows_iter, ())]
     headers_l = [h.lower() for h in headers]
 
     def col(name: str) -> Optional[int]:
@@ -159,17 +160,19 @@ def load_team_name_map() -> Dict[str, str]:
     c_owner = col("Owner")
     c_team  = col("Team Name")
     if not c_owner or not c_team:
+        wb.close()
         raise SystemExit("ERROR: docs/Team_Names.xlsx must have headers: Owner, Team Name")
 
     m: Dict[str, str] = {}
-    for r in range(2, ws.max_row + 1):
-        old = ws.cell(row=r, column=c_owner).value
-        new = ws.cell(row=r, column=c_team).value
+    for row in rows_iter:
+        old = row[c_owner - 1] if c_owner <= len(row) else None
+        new = row[c_team - 1] if c_team <= len(row) else None
         old_s = "" if old is None else str(old).strip()
         new_s = "" if new is None else str(new).strip()
         if old_s and new_s:
             m[old_s] = new_s
 
+    wb.close()
     print(f"Loaded Team_Names mapping entries: {len(m)}")
     return m
 
@@ -296,10 +299,12 @@ def load_rosters(rosters_xlsx: str) -> Dict[str, dict]:
     if not os.path.exists(rosters_xlsx):
         raise SystemExit(f"ERROR: Missing {rosters_xlsx}")
 
-    wb = load_workbook(rosters_xlsx, data_only=True)
+    # read_only streams rows as plain tuples (no per-cell objects / lookups)
+    wb = load_workbook(rosters_xlsx, data_only=True, read_only=True)
     ws = wb.active
+    rows_iter = ws.iter_rows(values_only=True)
 
-    headers = [("" if c.value is None else str(c.value).strip()) for c in ws[1]]
+    headers = [("" if v is None else str(v).strip()) for v in next(rows_iter, ())]
     headers_l = [h.lower() for h in headers]
 
     def col(*cands):
@@ -310,6 +315,7 @@ def load_rosters(rosters_xlsx: str) -> Dict[str, dict]:
 
     c_name   = col("name", "player")
     if not c_name:
+        wb.close()
         raise SystemExit("ERROR: rosters.xlsx must have a 'Name' column.")
 
     c_owner  = col("owner", "team name")
@@ -320,14 +326,14 @@ def load_rosters(rosters_xlsx: str) -> Dict[str, dict]:
     c_class  = col("class")
     c_pos    = col("position", "pos")
 
-    def sval(r: int, c: Optional[int]) -> str:
-        if c is None:
+    def sval(r: tuple, c: Optional[int]) -> str:
+        if c is None or c > len(r):
             return ""
-        v = ws.cell(row=r, column=c).value
+        v = r[c - 1]
         return "" if v is None else str(v).strip()
 
     out: Dict[str, dict] = {}
-    for r in range(2, ws.max_row + 1):
+    for r in rows_iter:
         name = sval(r, c_name)
         if not name:
             continue
@@ -344,6 +350,7 @@ def load_rosters(rosters_xlsx: str) -> Dict[str, dict]:
             "Pos": sval(r, c_pos),
         }
 
+    wb.close()
     return out
 
 
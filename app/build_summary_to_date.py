@@ -1,27 +1,37 @@
 import os
 import re
+import html
 import sys
 from collections import defaultdict
+from functools import lru_cache
 from bs4 import BeautifulSoup
 from openpyxl import load_workbook
 
 DOCS_DIR = os.path.join(os.path.dirname(__file__), "..", "docs")
 TEAM_NAMES_XLSX = os.path.join(DOCS_DIR, "Team_Names.xlsx")
 
+# Row fragments for SummaryToDate.html (written as bytes, so no per-cell str formatting/encoding)
+TD_NUM = b"<td class='num'>%d</td>"
+TD_AVG = b"<td class='num'>%.2f</td>"
+
+_WS        = re.compile(r"\s+")
+_OWNERS_PD = re.compile(r"Final_Owners_PD(\d+)\.html$")
+_CAP       = re.compile(r"PD(\d+)")
+
 
 def parse_cap_pd(argv) -> int | None:
     # optional: PD7
     if len(argv) < 2:
         return None
     s = argv[1].strip().upper()
-    m = re.fullmatch(r"PD(\d+)", s)
+    m = _CAP.fullmatch(s)
     if not m:
         raise SystemExit("Usage: python app/build_summary_to_date.py [PD7]")
     return int(m.group(1))
 
 
 def pd_num_from_filename(fn: str) -> int | None:
-    m = re.search(r"Final_Owners_PD(\d+)\.html$", fn)
+    m = _OWNERS_PD.search(fn)
     return int(m.group(1)) if m else None
 
 
@@ -69,10 +79,12 @@ def load_team_name_map() -> dict[str, str]:
         # If the file isn't present yet, just behave like "no mapping"
         return {}
 
-    wb = load_workbook(TEAM_NAMES_XLSX, data_only=True)
+    # read_only streams the sheet row by row instead of building every cell object
+    wb = load_workbook(TEAM_NAMES_XLSX, data_only=True, read_only=True)
     ws = wb.active
+    rows = ws.iter_rows(values_only=True)
 
-    headers = [("" if c.value is None else str(c.value).strip()) for c in ws[1]]
+    headers = [("" if v is None else str(v).strip()) for v in next(rows, ())]
     headers_l = [h.lower() for h in headers]
 
     def col(*cands):
@@ -86,28 +98,39 @@ def load_team_name_map() -> dict[str, str]:
     c_team  = col("team name", "team")
 
     if not c_owner or not c_team:
+        wb.close()
         raise SystemExit("ERROR: Team_Names.xlsx must have headers: Owner, Team Name")
 
+    i_owner = c_owner - 1
+    i_team  = c_team - 1
+
     out: dict[str, str] = {}
-    for r in range(2, ws.max_row + 1):
-        ow = ws.cell(row=r, column=c_owner).value
-        tn = ws.cell(row=r, column=c_team).value
+    for row in rows:
+        ow = row[i_owner] if i_owner < len(row) else None
+        tn = row[i_team] if i_team < len(row) else None
         owner = "" if ow is None else str(ow).strip()
         team  = "" if tn is None else str(tn).strip()
         if owner and team:
             out[owner] = team
 
+    wb.close()
     return out
 
 
-def canon_owner_key(s: str) -> str:
-    # normalize keys so "G-Flop" and "g flop" don't split
-    s = (s or "").strip().lower()
-    s = re.sub(r"\s+", " ", s)
+@lru_cache(maxsize=None)
+def _canon(s: str) -> str:
+    s = s.strip().lower()
+    s = _WS.sub(" ", s)
     s = s.replace("–", "-").replace("—", "-")
     return s
 
 
+def canon_owner_key(s: str) -> str:
+    # normalize keys so "G-Flop" and "g flop" don't split
+    # (cached: the same owners show up in every PD file)
+    return _canon(s or "")
+
+
 def build_owner_to_team_normalizer(team_map: dict[str, str]):
     """
     Returns normalize_owner_to_team(owner_raw) -> canonical team display name.
@@ -117,6 +140,8 @@ def build_owner_to_team_normalizer(team_map: dict[str, str]):
     """
     team_values = set(team_map.values())
 
+    # team_map is fixed once built, so each raw owner only needs resolving once
+    @lru_cache(maxsize=None)
     def normalize_owner_to_team(owner_raw: str) -> str:
         s = (owner_raw or "").strip()
         if not s:
@@ -147,13 +172,17 @@ def main():
 
     # Find Final_Owners_PD*.html
     pd_files: list[tuple[int, str]] = []
-    for fn in os.listdir(DOCS_DIR):
-        n = pd_num_from_filename(fn)
-        if n is None:
-            continue
-        if cap_pd is not None and n > cap_pd:
-            continue
-        pd_files.append((n, fn))
+    with os.scandir(DOCS_DIR) as it:
+        for entry in it:
+            fn = entry.name
+            if not fn.startswith("Final_Owners_PD") or not entry.is_file():
+                continue
+            n = pd_num_from_filename(fn)
+            if n is None:
+                continue
+            if cap_pd is not None and n > cap_pd:
+                continue
+            pd_files.append((n, entry.path))
 
     pd_files.sort(key=lambda x: x[0])  # PD1..PDN
 
@@ -163,12 +192,12 @@ def main():
     max_pd = pd_files[-1][0]
 
     # per_team_per_pd[key][pd] = points for that PD
+    # team_total[key] = running sum, kept up to date as each PD is read
     per_team_per_pd: dict[str, dict[int, int]] = defaultdict(dict)
-    display_name_by_key: dict[str, str] = {}
-    keys_set = set()
+    team_total: dict[str, int] = defaultdict(int)
+    display_name_by_key: dict[str, str] = {}  # also the (insertion-ordered) set of team keys
 
-    for pd, fn in pd_files:
-        path = os.path.join(DOCS_DIR, fn)
+    for pd, path in pd_files:
         totals = read_owner_totals_from_final_owners_html(path)
 
         for owner_raw, v in totals.items():
@@ -176,93 +205,110 @@ def main():
             team_name = normalize_owner_to_team(owner_raw)
             k = canon_owner_key(team_name)
 
-            keys_set.add(k)
-            per_team_per_pd[k][pd] = int(v)
+            v = int(v)
+            # a later cell for the same team+PD replaces the earlier one, so back it out of the total
+            team_total[k] += v - per_team_per_pd[k].get(pd, 0)
+            per_team_per_pd[k][pd] = v
 
             if k not in display_name_by_key:
                 display_name_by_key[k] = team_name
 
-    keys = sorted(list(keys_set), key=lambda k: display_name_by_key.get(k, k))
+    # No name sort needed here: keys_sorted below orders by (total, name)
+    keys = list(display_name_by_key)
 
-    # Totals + avg
+    # Pre-fill missing PDs with 0 so the table loop can subscript directly
+    for k in keys:
+        m = per_team_per_pd[k]
+        for pd in range(1, max_pd + 1):
+            m.setdefault(pd, 0)
+
+    # Avg (totals were accumulated during ingest)
     pd_list = [pd for pd, _ in pd_files]
     completed_pd_count = len(pd_list)
 
-    team_total: dict[str, int] = {}
     team_avg: dict[str, float] = {}
 
     for k in keys:
-        pd_scores = [per_team_per_pd[k].get(pd, 0) for pd in pd_list]
-        total = sum(pd_scores)
-        team_total[k] = total
+        total = team_total[k]
         team_avg[k] = (total / completed_pd_count) if completed_pd_count > 0 else 0.0
 
     # Sort by Total Pooh descending, then Team Name
-    keys_sorted = sorted(keys, key=lambda k: (-team_total.get(k, 0), display_name_by_key.get(k, k)))
+    # (decorate once so the sort compares plain tuples instead of doing dict lookups per key call)
+    decorated = [(-team_total[k], display_name_by_key[k], k) for k in keys]
+    decorated.sort()
+    keys_sorted = [t[2] for t in decorated]
 
     # Reference totals for Out Of 1st/2nd/3rd
     top1 = team_total.get(keys_sorted[0], 0) if len(keys_sorted) >= 1 else 0
     top2 = team_total.get(keys_sorted[1], top1) if len(keys_sorted) >= 2 else top1
     top3 = team_total.get(keys_sorted[2], top2) if len(keys_sorted) >= 3 else top2
 
-    # Write SummaryToDate.html
-    out_path = os.path.join(DOCS_DIR, "SummaryToDate.html")
-
-    with open(out_path, "w", encoding="utf-8") as out:
-        out.write("<!doctype html><html><head><meta charset='utf-8'>")
-        out.write("<title>Sorted League Results</title>")
-        out.write(
-            "<style>"
-            "body{font-family:Arial}"
-            "table{border-collapse:collapse;font-size:14px}"
-            "th,td{border:1px solid #ccc;padding:4px 6px}"
-            "th{background:#eee}"
-            "td.num{text-align:right}"
-            "</style>"
-        )
-        out.write("</head><body>")
-        out.write("<h2 style='text-align:center'>Sorted League Results</h2>")
-
-        out.write("<table><thead><tr>")
-        out.write("<th>Team Name</th>")
-        out.write("<th>Total Pooh</th>")
-        out.write("<th>Out Of 1st</th>")
-        out.write("<th>Out Of 2nd</th>")
-        out.write("<th>Out Of 3rd</th>")
+    # Escape + encode each team name once (numbers are generated here and need no escaping)
+    esc_display = {k: html.escape(v).encode("utf-8") for k, v in display_name_by_key.items()}
+
+    # Build SummaryToDate.html as one bytes payload, then write it in a single call
+    chunks: list[bytes] = []
+    add = chunks.append
+
+    add(b"<!doctype html><html><head><meta charset='utf-8'>")
+    add(b"<title>Sorted League Results</title>")
+    add(
+        b"<style>"
+        b"body{font-family:Arial}"
+        b"table{border-collapse:collapse;font-size:14px}"
+        b"th,td{border:1px solid #ccc;padding:4px 6px}"
+        b"th{background:#eee}"
+        b"td.num{text-align:right}"
+        b"</style>"
+    )
+    add(b"</head><body>")
+    add(b"<h2 style='text-align:center'>Sorted League Results</h2>")
+
+    add(b"<table><thead><tr>")
+    add(b"<th>Team Name</th>")
+    add(b"<th>Total Pooh</th>")
+    add(b"<th>Out Of 1st</th>")
+    add(b"<th>Out Of 2nd</th>")
+    add(b"<th>Out Of 3rd</th>")
+
+    for pd in range(1, max_pd + 1):
+        add(b"<th>%d</th>" % pd)
+
+    add(b"<th>Avg Pooh Per Completed PD</th>")
+    add(b"<th>Sum of Avgs, Top 5 Eligible</th>")  # blank for now
+    add(b"</tr></thead><tbody>")
+
+    for k in keys_sorted:
+        total = team_total[k]
+        out1 = max(0, top1 - total)
+        out2 = max(0, top2 - total)
+        out3 = max(0, top3 - total)
+
+        team_display = esc_display[k]
+        pd_scores = per_team_per_pd[k]
+
+        add(b"<tr>")
+        add(b"<td>%s</td>" % team_display)
+        add(TD_NUM % total)
+        add(TD_NUM % out1)
+        add(TD_NUM % out2)
+        add(TD_NUM % out3)
 
         for pd in range(1, max_pd + 1):
-            out.write(f"<th>{pd}</th>")
+            add(TD_NUM % pd_scores[pd])
 
-        out.write("<th>Avg Pooh Per Completed PD</th>")
-        out.write("<th>Sum of Avgs, Top 5 Eligible</th>")  # blank for now
-        out.write("</tr></thead><tbody>")
+        add(TD_AVG % team_avg[k])
 
-        for k in keys_sorted:
-            total = team_total.get(k, 0)
-            out1 = max(0, top1 - total)
-            out2 = max(0, top2 - total)
-            out3 = max(0, top3 - total)
+        # Blank column on purpose
+        add(b"<td class='num'></td>")
 
-            team_display = display_name_by_key.get(k, "")
+        add(b"</tr>")
 
-            out.write("<tr>")
-            out.write(f"<td>{team_display}</td>")
-            out.write(f"<td class='num'>{total}</td>")
-            out.write(f"<td class='num'>{out1}</td>")
-            out.write(f"<td class='num'>{out2}</td>")
-            out.write(f"<td class='num'>{out3}</td>")
+    add(b"</tbody></table></body></html>")
 
-            for pd in range(1, max_pd + 1):
-                out.write(f"<td class='num'>{per_team_per_pd[k].get(pd, 0)}</td>")
-
-            out.write(f"<td class='num'>{team_avg.get(k, 0.0):.2f}</td>")
-
-            # Blank column on purpose
-            out.write("<td class='num'></td>")
-
-            out.write("</tr>")
-
-        out.write("</tbody></table></body></html>")
+    out_path = os.path.join(DOCS_DIR, "SummaryToDate.html")
+    with open(out_path, "wb") as out:
+        out.write(b"".join(chunks))
 
     print(f"Wrote: {out_path}")
 
@@ -2,10 +2,13 @@ import os
 import re
 import sys
 import html
+import pickle
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
 from typing import Dict, List, Optional, Tuple, Set
 
-from bs4 import BeautifulSoup
+from lxml import etree
 from openpyxl import load_workbook
 
 REPO_ROOT = os.path.join(os.path.dirname(__file__), "..")
@@ -17,53 +20,96 @@ TEAM_NAMES_XLSX = os.path.join(DOCS_DIR, "Team_Names.xlsx")
 
 OUT_DIR = os.path.join(DOCS_DIR, "Teams")
 
+# parsed Final_Players_PD*.html results, reused while the source file is unchanged (gitignored)
+CACHE_DIR = os.path.join(DOCS_DIR, ".cache")
+PARSE_CACHE_VERSION = 4  # bump when parse_final_players_pd_file's output changes
+
+# Final_* pages are written by python_today_pooh.py as UTF-8
+HTML_ENCODING = "utf-8"
+
 
 # ----------------------------
 # Helpers
 # ----------------------------
+_NON_WORD = re.compile(r"[^\w\s]")
+_SUFFIX   = re.compile(r"\b(?:jr|sr|ii|iii|iv)\b")
+_WS       = re.compile(r"\s+")
+_FN_BAD   = re.compile(r"[^A-Za-z0-9_\-]")
+_FINAL_PD = re.compile(r"Final_Players_PD(\d+)\.html$")
+_CAP      = re.compile(r"PD(\d+)")
+
+
 def parse_cap_pd(argv) -> Optional[int]:
     if len(argv) < 2:
         return None
     s = argv[1].strip().upper()
-    m = re.fullmatch(r"PD(\d+)", s)
+    m = _CAP.fullmatch(s)
     if not m:
         raise SystemExit("Usage: python app/build_team_pages.py [PD7]")
     return int(m.group(1))
 
 
+@lru_cache(maxsize=None)  # same few hundred names recur in every PD file + the roster
 def norm_name(name: str) -> str:
     s = (name or "").lower()
-    s = re.sub(r"[^\w\s]", " ", s)
-    s = re.sub(r"\b(jr|sr|ii|iii|iv)\b", " ", s)
-    s = re.sub(r"\s+", " ", s).strip()
+    s = _NON_WORD.sub(" ", s)
+    s = _SUFFIX.sub(" ", s)
+    s = _WS.sub(" ", s).strip()
     return s
 
 
 def safe_int(x) -> int:
+    # fast paths: already an int, or a cell string (int() ignores surrounding whitespace,
+    # so no str()/strip() round-trip); "12.0"-style values fall back through float()
+    if type(x) is int:
+        return x
+    if isinstance(x, str):
+        if not x:
+            return 0
+        try:
+            return int(x)
+        except ValueError:
+            try:
+                return int(float(x))
+            except (ValueError, OverflowError):
+                return 0
     try:
+        if isinstance(x, float):
+            return int(x)
         return int(str(x).strip())
-    except:
+    except Exception:
         return 0
 
 
 def safe_float(x) -> float:
+    if type(x) is float:
+        return x
+    if isinstance(x, str):
+        if not x:
+            return 0.0
+        try:
+            return float(x)
+        except ValueError:
+            return 0.0
     try:
+        if isinstance(x, int):
+            return float(x)
         return float(str(x).strip())
-    except:
+    except Exception:
         return 0.0
 
 
 def sanitize_team_filename(team_name: str) -> str:
     s = (team_name or "").strip()
     s = s.replace(" ", "_")
-    s = re.sub(r"[^A-Za-z0-9_\-]", "", s)
+    s = _FN_BAD.sub("", s)
     if not s:
         s = "Team"
     return s + ".html"
 
 
 def pd_num_from_players_filename(fn: str) -> Optional[int]:
-    m = re.search(r"Final_Players_PD(\d+)\.html$", fn)
+    m = _FINAL_PD.search(fn)
     return int(m.group(1)) if m else None
 
 
@@ -74,10 +120,11 @@ def load_team_name_map() -> Dict[str, str]:
     if not os.path.exists(TEAM_NAMES_XLSX):
         raise SystemExit(f"ERROR: Missing {TEAM_NAMES_XLSX}")
 
-    wb = load_workbook(TEAM_NAMES_XLSX, data_only=True)
+    wb = load_workbook(TEAM_NAMES_XLSX, data_only=True, read_only=True)
     ws = wb.active
+    rows_iter = ws.iter_rows(values_only=True)
 
-    headers = [("" if c.value is None else str(c.value).strip()) for c in ws[1]]
+    headers = [("" if v is None else str(v).strip()) for v in next(rows_iter, ())]
     headers_l = [h.lower() for h in headers]
 
     def col(*cands):
@@ -89,17 +136,19 @@ def load_team_name_map() -> Dict[str, str]:
     c_owner = col("owner")
     c_team  = col("team name", "team")
     if not c_owner or not c_team:
+        wb.close()
         raise SystemExit("ERROR: Team_Names.xlsx must have headers: Owner, Team Name")
 
     out = {}
-    for r in range(2, ws.max_row + 1):
-        owner = ws.cell(row=r, column=c_owner).value
-        team  = ws.cell(row=r, column=c_team).value
+    for row in rows_iter:
+        owner = row[c_owner - 1] if c_owner <= len(row) else None
+        team  = row[c_team - 1] if c_team <= len(row) else None
         owner = "" if owner is None else str(owner).strip()
         team  = "" if team is None else str(team).strip()
         if owner and team:
             out[owner] = team
 
+    wb.close()
     return out
 
 
@@ -114,10 +163,12 @@ def load_rosters() -> Dict[str, dict]:
     if not os.path.exists(ROSTERS_XLSX):
         raise SystemExit(f"ERROR: Missing {ROSTERS_XLSX}")
 
-    wb = load_workbook(ROSTERS_XLSX, data_only=True)
+    # read_only streams rows as plain tuples (no per-cell objects / lookups)
+    wb = load_workbook(ROSTERS_XLSX, data_only=True, read_only=True)
     ws = wb.active
+    rows_iter = ws.iter_rows(values_only=True)
 
-    headers = [("" if c.value is None else str(c.value).strip()) for c in ws[1]]
+    headers = [("" if v is None else str(v).strip()) for v in next(rows_iter, ())]
     headers_l = [h.lower() for h in headers]
 
     def col(*cands):
@@ -137,16 +188,17 @@ def load_rosters() -> Dict[str, dict]:
     c_class = col("class")
 
     if not c_name or not c_owner:
+        wb.close()
         raise SystemExit("ERROR: rosters.xlsx must have at least Name and Owner columns.")
 
-    def sval(r: int, c: Optional[int]) -> str:
-        if c is None:
+    def sval(r: tuple, c: Optional[int]) -> str:
+        if c is None or c > len(r):
             return ""
-        v = ws.cell(row=r, column=c).value
+        v = r[c - 1]
         return "" if v is None else str(v).strip()
 
     out: Dict[str, dict] = {}
-    for r in range(2, ws.max_row + 1):
+    for r in rows_iter:
         name = sval(r, c_name)
         if not name:
             continue
@@ -164,58 +216,156 @@ def load_rosters() -> Dict[str, dict]:
             "Class": sval(r, c_class),
         }
 
+    wb.close()
     return out
 
 
 # ----------------------------
 # Parse Final_Players_PD*.html (starter detection via start class, started_today, OR bold)
 # ----------------------------
-def parse_final_players_pd_file(path: str) -> Tuple[List[str], List[dict]]:
-    with open(path, "r", encoding="utf-8") as f:
-        soup = BeautifulSoup(f.read(), "html.parser")
+def cell_text(el) -> str:
+    # same as BeautifulSoup get_text(strip=True): strip each text piece, then join
+    return "".join(t.strip() for t in el.itertext())
+
+
+def parse_final_players_pd_file(path: str) -> Tuple[List[str], List[Tuple[Tuple[str, ...], bool]]]:
+    # Stream the first <table> with lxml iterparse: each <tr> is handled when it closes and its
+    # elements are then dropped from the tree, so the DOM never holds more than about one row.
+    # The extracted cell text of every row is still kept (in raw_rows) until the table ends,
+    # because header names can keep arriving until then.
+    # Returns (names, rows): names are the header names (each once, first-seen order) and each row
+    # is (values, is_starter) with values a tuple aligned with names (missing cells are ""), so
+    # callers look fields up by header index, not per-row dicts.
+    headers_l: List[str] = []
+    raw_rows: List[Tuple[List[str], bool]] = []  # (cell texts, starter by css/bold) until all headers are known
+
+    table_depth = 0      # > 0 while inside the first table
+    seen_table = False
+    first_tr = True      # the first row of the table is the header row
+
+    events = etree.iterparse(path, events=("start", "end"), tag=("table", "tr"), html=True, encoding=HTML_ENCODING)
+    try:
+        for event, el in events:
+            if el.tag == "table":
+                if event == "start":
+                    if seen_table and table_depth == 0:
+                        break  # only the first table is read
+                    seen_table = True
+                    table_depth += 1
+                else:
+                    table_depth -= 1
+                    if table_depth == 0:
+                        break
+                continue
+
+            if event == "start" or table_depth == 0:
+                continue
+
+            # interned for the lookups below; pickling (parse cache, process pool) hands back plain
+            # copies, so the loader interns the names again on its side
+            headers_l.extend(sys.intern(cell_text(th).lower()) for th in el.iter("th"))
 
-    table = soup.find("table")
-    if not table:
+            if first_tr:
+                first_tr = False
+            else:
+                tds = list(el.iter("td"))
+                if tds:
+                    is_starter_by_css = any(("start" in (td.get("class") or "").split()) for td in tds)
+                    is_starter_by_bold = bool(el.xpath(".//td//b | .//td//strong"))
+                    raw_rows.append(([cell_text(td) for td in tds], is_starter_by_css or is_starter_by_bold))
+
+            # done with this row: free it and anything before it
+            el.clear()
+            while el.getprevious() is not None:
+                del el.getparent()[0]
+    except etree.XMLSyntaxError:
+        # nothing parseable at all (e.g. a zero-byte, half-written snapshot): treat it like a file with no table
         return [], []
 
-    ths = table.find_all("th")
-    headers = [th.get_text(strip=True) for th in ths]
-    headers_l = [h.lower() for h in headers]
+    # A header row can repeat mid-table, so headers_l is only complete now. The old per-row dicts
+    # did row[h] = values[i] for every header index i inside the row, so a duplicated header name
+    # resolved to its LAST column within that row. Resolve it the same way (once per distinct row
+    # length) and return each row aligned with the de-duplicated header names.
+    names = list(dict.fromkeys(headers_l))
+    identity = list(range(len(names)))
+    picks_by_len: Dict[int, Optional[List[int]]] = {}  # row length -> column index per name (-1: missing); None = as-is
+    i_started = [names.index(h) for h in ("started_today", "started today") if h in names]
 
-    rows_out: List[dict] = []
-    trs = table.find_all("tr")
-    for tr in trs[1:]:
-        tds = tr.find_all("td")
-        if not tds:
-            continue
+    rows_out: List[Tuple[Tuple[str, ...], bool]] = []
+    for values, is_starter in raw_rows:
+        n = len(values)
+        if n in picks_by_len:
+            pick = picks_by_len[n]
+        else:
+            last: Dict[str, int] = {}
+            for i, h in enumerate(headers_l[:n]):
+                last[h] = i
+            pick = [last.get(h, -1) for h in names]
+            pick = picks_by_len[n] = None if (n == len(names) and pick == identity) else pick
+
+        row = tuple(values) if pick is None else tuple(values[i] if i >= 0 else "" for i in pick)
 
-        is_starter_by_css = any(("start" in (td.get("class") or [])) for td in tds)
-        is_starter_by_bold = any((td.find("b") is not None) or (td.find("strong") is not None) for td in tds)
+        started_today_txt = ""
+        for i in i_started:
+            started_today_txt = started_today_txt or row[i]
+        is_starter_by_col = started_today_txt.strip().lower() in ("yes", "y", "true", "1")
 
-        values = [td.get_text(strip=True) for td in tds]
-        row = {}
-        for i, h in enumerate(headers_l):
-            if i < len(values):
-                row[h] = values[i]
+        rows_out.append((row, bool(is_starter or is_starter_by_col)))
 
-        started_today_txt = (row.get("started_today") or row.get("started today") or "").strip().lower()
-        is_starter_by_col = started_today_txt in ("yes", "y", "true", "1")
+    return names, rows_out
 
-        row["__is_starter"] = bool(is_starter_by_css or is_starter_by_col or is_starter_by_bold)
-        rows_out.append(row)
 
-    return headers_l, rows_out
+# per-player season totals are stored positionally: agg[key] = [games, min, pts, reb, ast, stl, blk, to]
+EMPTY_AGG = (0, 0.0, 0, 0, 0, 0, 0, 0)
+
+
+def parse_final_players_pd_file_cached(path: str) -> Tuple[List[str], List[Tuple[Tuple[str, ...], bool]]]:
+    """
+    parse_final_players_pd_file(), cached in docs/.cache/<file>.pkl.
+    The cache entry is only used if the source file's mtime and size still match.
+    """
+    st = os.stat(path)
+    stamp = (PARSE_CACHE_VERSION, st.st_mtime_ns, st.st_size)
+    cache_path = os.path.join(CACHE_DIR, os.path.basename(path) + ".pkl")
+
+    try:
+        with open(cache_path, "rb") as f:
+            cached_stamp, result = pickle.load(f)
+        if cached_stamp == stamp:
+            return result
+    except Exception:
+        pass  # missing / unreadable / old format -> just re-parse
+
+    result = parse_final_players_pd_file(path)
+
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp_path = cache_path + f".{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump((stamp, result), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        print(f"NOTE: could not write parse cache {cache_path}: {e}")
+
+    return result
 
 
 def load_final_player_data_and_actuals(cap_pd: Optional[int], team_map_rev: Dict[str, str]):
     files = []
-    for fn in os.listdir(DOCS_DIR):
-        n = pd_num_from_players_filename(fn)
-        if n is None:
-            continue
-        if cap_pd is not None and n > cap_pd:
-            continue
-        files.append((n, fn))
+    with os.scandir(DOCS_DIR) as it:
+        for entry in it:
+            fn = entry.name
+            # cheap string test first; only likely candidates go through the regex
+            if not (fn.startswith("Final_Players_PD") and fn.endswith(".html")):
+                continue
+            if not entry.is_file():
+                continue
+            n = pd_num_from_players_filename(fn)
+            if n is None:
+                continue
+            if cap_pd is not None and n > cap_pd:
+                continue
+            files.append((n, entry.path))
     files.sort(key=lambda x: x[0])
 
     if not files:
@@ -223,20 +373,41 @@ def load_final_player_data_and_actuals(cap_pd: Optional[int], team_map_rev: Dict
 
     max_pd = files[-1][0]
 
-    pooh_by_player_pd: Dict[str, Dict[int, int]] = defaultdict(dict)
-    agg = defaultdict(lambda: {"games": 0, "min": 0.0, "pts": 0, "reb": 0, "ast": 0, "stl": 0, "blk": 0, "to": 0})
+    pooh_by_player_pd: Dict[str, Dict[int, int]] = {}
+    agg: Dict[str, list] = {}
     actual_by_owner_pd: Dict[str, Dict[int, int]] = defaultdict(dict)
     starters_by_owner_pd: Dict[str, Dict[int, Set[str]]] = defaultdict(lambda: defaultdict(set))
 
-    for pd, fn in files:
-        path = os.path.join(DOCS_DIR, fn)
-        headers_l, rows = parse_final_players_pd_file(path)
+    # PD files are independent and parsing dominates, so parse them across cores
+    # and do the (cheap) merging below in this process.
+    paths = [path for _, path in files]
+    with ProcessPoolExecutor() as ex:
+        parsed = list(ex.map(parse_final_players_pd_file_cached, paths, chunksize=1))
+
+    for (pd, _), (headers_l, rows) in zip(files, parsed):
         if not headers_l or not rows:
             continue
 
-        for r in rows:
-            owner_raw = (r.get("owner") or "").strip()
-            player = (r.get("player") or "").strip()
+        # header -> column index, once per file (the parser already de-duplicated the names).
+        # Interned here: the names arrive unpickled (from a worker or the parse cache), which
+        # drops the parser's interning.
+        col = {sys.intern(h): i for i, h in enumerate(headers_l)}
+        i_owner = col.get("owner")
+        i_player = col.get("player")
+        if i_owner is None or i_player is None:
+            continue
+        i_pooh = col.get("pooh")
+        i_min = col.get("min")
+        # (agg slot, column index) for the integer stats this file actually has
+        int_stats = [
+            (slot, col[h])
+            for slot, h in ((2, "pts"), (3, "reb"), (4, "ast"), (5, "stl"), (6, "blk"), (7, "to"))
+            if h in col
+        ]
+
+        for v, is_starter in rows:
+            owner_raw = v[i_owner].strip()
+            player = v[i_player].strip()
             if not owner_raw or not player:
                 continue
 
@@ -246,19 +417,23 @@ def load_final_player_data_and_actuals(cap_pd: Optional[int], team_map_rev: Dict
             if not key:
                 continue
 
-            pooh = safe_int(r.get("pooh", 0))
-            pooh_by_player_pd[key][pd] = pooh
-
-            agg[key]["games"] += 1
-            agg[key]["min"] += safe_float(r.get("min", 0.0))
-            agg[key]["pts"] += safe_int(r.get("pts", 0))
-            agg[key]["reb"] += safe_int(r.get("reb", 0))
-            agg[key]["ast"] += safe_int(r.get("ast", 0))
-            agg[key]["stl"] += safe_int(r.get("stl", 0))
-            agg[key]["blk"] += safe_int(r.get("blk", 0))
-            agg[key]["to"]  += safe_int(r.get("to", 0))
-
-            if r.get("__is_starter"):
+            pooh = safe_int(v[i_pooh]) if i_pooh is not None else 0
+            by_pd = pooh_by_player_pd.get(key)
+            if by_pd is None:
+                by_pd = pooh_by_player_pd[key] = {}
+            by_pd[pd] = pooh
+
+            # one bucket lookup per row (plain dict: no factory call on first sight), then plain adds
+            a = agg.get(key)
+            if a is None:
+                a = agg[key] = list(EMPTY_AGG)
+            a[0] += 1
+            if i_min is not None:
+                a[1] += safe_float(v[i_min])
+            for slot, i in int_stats:
+                a[slot] += safe_int(v[i])
+
+            if is_starter:
                 actual_by_owner_pd[owner][pd] = actual_by_owner_pd[owner].get(pd, 0) + pooh
                 starters_by_owner_pd[owner][pd].add(key)
 
@@ -266,8 +441,9 @@ def load_final_player_data_and_actuals(cap_pd: Optional[int], team_map_rev: Dict
 
 
 # ----------------------------
-# MAX lineup constraint DP
+# MAX lineup (2-3 guards, 2-3 forwards)
 # ----------------------------
+@lru_cache(maxsize=256)  # only a handful of distinct position strings exist
 def classify_pos(pos: str) -> str:
     p = (pos or "").upper().replace(" ", "")
     if not p:
@@ -284,44 +460,56 @@ def classify_pos(pos: str) -> str:
 
 
 def best_valid_lineup_sum(player_items: List[Tuple[int, str]]) -> int:
+    # Best 5 with 2-3 guards / 2-3 forwards. G-only players can only fill guard
+    # spots, F-only only forward spots, GF/unknown either. For a fixed count taken
+    # from each pool the best choice is that pool's top-k, so just try every
+    # (G-only, F-only, flex) count split using prefix sums.
     if len(player_items) < 5:
         return 0
 
-    NEG = -10**18
-    dp = [[NEG] * 4 for _ in range(6)]
-    dp[0][0] = 0
-
+    guards: List[int] = []
+    forwards: List[int] = []
+    flex: List[int] = []
     for pooh, pos_class in player_items:
-        pc = (pos_class or "")
-        if pc not in ("G", "F", "GF", ""):
-            pc = ""
-
-        ndp = [row[:] for row in dp]
-        for picked in range(0, 5):
-            for guards in range(0, 4):
-                cur = dp[picked][guards]
-                if cur == NEG:
-                    continue
-
-                if pc in ("G", "GF", ""):
-                    np = picked + 1
-                    ng = guards + 1
-                    if ng <= 3:
-                        nf = np - ng
-                        if nf <= 3:
-                            ndp[np][ng] = max(ndp[np][ng], cur + pooh)
-
-                if pc in ("F", "GF", ""):
-                    np = picked + 1
-                    ng = guards
-                    nf = np - ng
-                    if nf <= 3:
-                        ndp[np][ng] = max(ndp[np][ng], cur + pooh)
-
-        dp = ndp
-
-    best = max(dp[5][2], dp[5][3])
-    return 0 if best == NEG else int(best)
+        if pos_class == "G":
+            guards.append(pooh)
+        elif pos_class == "F":
+            forwards.append(pooh)
+        else:
+            flex.append(pooh)
+
+    n_g, n_f, n_x = len(guards), len(forwards), len(flex)
+    # can't seat 2 of each side, or can't fill 5 seats with at most 3 per side
+    if n_g + n_x < 2 or n_f + n_x < 2 or min(n_g, 3) + min(n_f, 3) + n_x < 5:
+        return 0
+    # everyone is flex: any 5 form a valid lineup
+    if n_x == len(player_items):
+        flex.sort(reverse=True)
+        return sum(flex[:5])
+
+    def prefix_sums(vals: List[int]) -> List[int]:
+        vals.sort(reverse=True)
+        out = [0]
+        for v in vals[:5]:
+            out.append(out[-1] + v)
+        return out
+
+    pg = prefix_sums(guards)
+    pf = prefix_sums(forwards)
+    px = prefix_sums(flex)
+
+    best = None
+    # a G-only + b F-only + the rest from flex; "2 or 3 guards" <=> a <= 3 and b <= 3
+    for a in range(min(3, len(pg) - 1) + 1):
+        for b in range(min(3, len(pf) - 1) + 1):
+            c = 5 - a - b
+            if c < 0 or c >= len(px):
+                continue
+            total = pg[a] + pf[b] + px[c]
+            if best is None or total > best:
+                best = total
+
+    return 0 if best is None else int(best)
 
 
 def per_game(n: float, games: int) -> float:
@@ -331,12 +519,17 @@ def per_game(n: float, games: int) -> float:
 # ----------------------------
 # HTML output
 # ----------------------------
+# right-aligned numeric columns (PD columns are handled separately)
+NUM_COLS = frozenset({"Draft Order","Cost","Min/G","Total","Avg","PPG","R/G","A/G","B/G","S/G","T/G"})
+
+
 def write_team_page(
     out_path: str,
     team_title: str,
-    cols: List[str],
-    rows: List[Dict[str, str]],
-    pd_highlight_cells: Dict[Tuple[int, str], bool],
+    col_plan: Tuple[Tuple[str, str, int], ...],
+    rows: List[List[str]],
+    row_keys: List[str],
+    starter_keys_by_pd: Dict[int, Set[str]],
     actual_pd: Dict[int, int],
     max_pd_sums: Dict[int, int],
     total_actual: int,
@@ -370,10 +563,18 @@ def write_team_page(
         }
         return widths.get(c, 45)
 
-    with open(out_path, "w", encoding="utf-8") as out:
-        out.write("<!doctype html><html><head><meta charset='utf-8'>")
-        out.write(f"<title>{esc(team_title)}</title>")
-        out.write("""
+    # Escape the fixed strings once up front
+    esc_title = esc(team_title)
+    cols_esc = [esc(c) for c, _, _ in col_plan]
+    col_widths = [col_width_px(c) for c, _, _ in col_plan]
+
+    # Collect the page in memory and write it once
+    parts: List[str] = []
+    add = parts.append
+
+    add("<!doctype html><html><head><meta charset='utf-8'>")
+    add(f"<title>{esc_title}</title>")
+    add("""
 <style>
 body{font-family:Arial;background:#ffffff;margin:0;padding:0}
 
@@ -402,69 +603,78 @@ tr.totalrow td{background:#000;color:#000}
 tr.totalrow td.keep{background:#ffffff;color:#000;font-weight:bold}
 </style>
         """)
-        out.write("</head><body><div class='wrapper'>")
-        out.write(f"<h1>{esc(team_title)}</h1>")
-
-        out.write("<table><colgroup>")
-        for c in cols:
-            out.write(f"<col style='width:{col_width_px(c)}px'>")
-        out.write("</colgroup><thead><tr>")
-        for c in cols:
-            out.write(f"<th title='{esc(c)}'>{esc(c)}</th>")
-        out.write("</tr></thead><tbody>")
-
-        for r in rows:
-            out.write("<tr>")
-            player_key = r.get("__key", "")
-            for c in cols:
-                v = r.get(c, "")
-
-                if c.isdigit():
-                    pd = int(c)
-                    if v == "":
-                        out.write("<td class='blank'>&nbsp;</td>")
-                    else:
-                        cls = "hit" if pd_highlight_cells.get((pd, player_key), False) else ""
-                        out.write(f"<td class='{cls}'>{esc(v)}</td>" if cls else f"<td>{esc(v)}</td>")
-                    continue
-
-                if c in {"Draft Order","Cost","Min/G","Total","Avg","PPG","R/G","A/G","B/G","S/G","T/G"}:
-                    out.write(f"<td class='num' title='{esc(v)}'>{esc(v)}</td>")
+    add("</head><body><div class='wrapper'>")
+    add(f"<h1>{esc_title}</h1>")
+
+    add("<table><colgroup>")
+    for w in col_widths:
+        add(f"<col style='width:{w}px'>")
+    add("</colgroup><thead><tr>")
+    for ce in cols_esc:
+        add(f"<th title='{ce}'>{ce}</th>")
+    add("</tr></thead><tbody>")
+
+    # player key -> PDs where they were an actual starter (built once, so each PD cell is one set check)
+    started_pds: Dict[str, Set[int]] = defaultdict(set)
+    for pd, keys in starter_keys_by_pd.items():
+        for k in keys:
+            started_pds[k].add(pd)
+
+    escape = html.escape  # row values are already strings; skip esc()'s None/str() handling
+
+    # rows[i] holds one value per column (aligned with col_plan); row_keys[i] is that player's key
+    for player_key, r in zip(row_keys, rows):
+        hit_pds = started_pds.get(player_key, ())
+        cells: List[str] = []
+        for v, (_, kind, pd) in zip(r, col_plan):
+            if kind == "pd":
+                # PD values are formatted ints built in main(), nothing to escape
+                if v == "":
+                    cells.append("<td class='blank'>&nbsp;</td>")
+                elif pd in hit_pds:
+                    cells.append(f"<td class='hit'>{v}</td>")
                 else:
-                    out.write(f"<td title='{esc(v)}'>{esc(v)}</td>")
-            out.write("</tr>")
-
-        # Actual row
-        out.write("<tr class='totalrow'>")
-        for c in cols:
-            if c == "Total":
-                out.write(f"<td class='keep num'>{total_actual}</td>")
-            elif c == "Avg":
-                out.write("<td class='keep'>Actual</td>")
-            elif c.isdigit():
-                pd = int(c)
-                out.write(f"<td class='keep num'>{actual_pd.get(pd, 0)}</td>")
-            else:
-                out.write("<td>&nbsp;</td>")
-        out.write("</tr>")
-
-        # Max row
-        out.write("<tr class='totalrow'>")
-        for c in cols:
-            if c == "Total":
-                out.write(f"<td class='keep num'>{total_max}</td>")
-            elif c == "Avg":
-                out.write("<td class='keep'>Max</td>")
-            elif c.isdigit():
-                pd = int(c)
-                out.write(f"<td class='keep num'>{max_pd_sums.get(pd, 0)}</td>")
-            else:
-                out.write("<td>&nbsp;</td>")
-        out.write("</tr>")
-
-        out.write("</tbody></table></div></body></html>")
+                    cells.append(f"<td>{v}</td>")
+                continue
 
-    print(f"Wrote: {out_path}")
+            ev = escape(v)  # used for both the tooltip and the text
+            if kind == "num":
+                cells.append(f"<td class='num' title='{ev}'>{ev}</td>")
+            else:
+                cells.append(f"<td title='{ev}'>{ev}</td>")
+        add(f"<tr>{''.join(cells)}</tr>")
+
+    # Actual row
+    add("<tr class='totalrow'>")
+    for c, kind, pd in col_plan:
+        if c == "Total":
+            add(f"<td class='keep num'>{total_actual}</td>")
+        elif c == "Avg":
+            add("<td class='keep'>Actual</td>")
+        elif kind == "pd":
+            add(f"<td class='keep num'>{actual_pd.get(pd, 0)}</td>")
+        else:
+            add("<td>&nbsp;</td>")
+    add("</tr>")
+
+    # Max row
+    add("<tr class='totalrow'>")
+    for c, kind, pd in col_plan:
+        if c == "Total":
+            add(f"<td class='keep num'>{total_max}</td>")
+        elif c == "Avg":
+            add("<td class='keep'>Max</td>")
+        elif kind == "pd":
+            add(f"<td class='keep num'>{max_pd_sums.get(pd, 0)}</td>")
+        else:
+            add("<td>&nbsp;</td>")
+    add("</tr>")
+
+    add("</tbody></table></div></body></html>")
+
+    # encode the whole page once and hand it to the OS in a single binary write
+    with open(out_path, "wb") as out:
+        out.write("".join(parts).encode("utf-8"))
 
 
 # ----------------------------
@@ -474,13 +684,23 @@ def main():
     cap_pd = parse_cap_pd(sys.argv)
 
     team_map = load_team_name_map()
-    team_map_rev = {v: k for k, v in team_map.items()}  # Team Name -> Owner (old)
+    # Team Name -> Owner (old); interned since a handful of owners are looked up/compared for every row
+    team_map_rev = {sys.intern(v): sys.intern(k) for k, v in team_map.items()}
     rosters = load_rosters()
 
+    # position class never changes across PDs, so classify each roster player once
+    pos_class_by_key = {k: classify_pos(info.get("Position", "")) for k, info in rosters.items()}
+
     max_pd, pooh_by_player_pd, agg, actual_by_owner_pd, starters_by_owner_pd = load_final_player_data_and_actuals(
         cap_pd, team_map_rev
     )
 
+    # dense per-player PD values: pd_vals_by_key[k][pd - 1] = pooh for that PD, or None if not played
+    no_pd_vals: List[Optional[int]] = [None] * max_pd
+    pd_vals_by_key: Dict[str, List[Optional[int]]] = {
+        k: [pbp.get(pd) for pd in range(1, max_pd + 1)] for k, pbp in pooh_by_player_pd.items()
+    }
+
     os.makedirs(OUT_DIR, exist_ok=True)
 
     players_by_owner: Dict[str, List[str]] = defaultdict(list)
@@ -488,96 +708,89 @@ def main():
         owner_old = info.get("Owner", "")
         players_by_owner[owner_old].append(k)
 
-    for owner_old, player_keys in players_by_owner.items():
+    # every team page has the same columns, so lay them out (and classify them) once:
+    # col_plan[i] = (name, kind, pd) with kind "pd" (pd = PD number), "num" or "txt" (pd = 0)
+    fixed_cols = [
+        "Team Name","Name","Draft Order","Cost","Team","Position","Height","Weight","Class","Min/G","Total","Avg"
+    ]
+    pd_cols = [str(i) for i in range(1, max_pd + 1)]
+    tail_cols = ["PPG","R/G","A/G","B/G","S/G","T/G"]
+    cols = fixed_cols + pd_cols + tail_cols
+    col_plan = tuple(
+        (c, "pd", int(c)) if c.isdigit() else (c, "num" if c in NUM_COLS else "txt", 0) for c in cols
+    )
+
+    def build_and_write_team(owner_old: str, player_keys: List[str]) -> str:
         team_name = display_team_name(owner_old, team_map)
         team_title = f"Sorted Summary Results For {team_name}"
 
-        fixed_cols = [
-            "Team Name","Name","Draft Order","Cost","Team","Position","Height","Weight","Class","Min/G","Total","Avg"
-        ]
-        pd_cols = [str(i) for i in range(1, max_pd + 1)]
-        tail_cols = ["PPG","R/G","A/G","B/G","S/G","T/G"]
-        cols = fixed_cols + pd_cols + tail_cols
-
-        # highlight ACTUAL starters
-        pd_highlight_cells: Dict[Tuple[int, str], bool] = {}
-        for pd in range(1, max_pd + 1):
-            starter_keys = starters_by_owner_pd.get(owner_old, {}).get(pd, set())
-            for k in starter_keys:
-                pd_highlight_cells[(pd, k)] = True
+        # highlight ACTUAL starters (PD -> set of player keys)
+        starter_keys_by_pd = starters_by_owner_pd.get(owner_old, {})
 
-        rows_out: List[Dict[str, str]] = []
+        # rows are plain lists in cols order; sort keys are kept numerically alongside
+        rows_out: List[List[str]] = []
+        avg_keys: List[float] = []
+        total_keys: List[int] = []
+        name_keys: List[str] = []
         for k in player_keys:
             info = rosters.get(k, {})
-            g = agg.get(k, {"games": 0, "min": 0.0, "pts": 0, "reb": 0, "ast": 0, "stl": 0, "blk": 0, "to": 0})
-            games = int(g.get("games", 0))
-
-            played_pd_count = 0
-            total_pooh = 0
-            pd_vals: List[Optional[int]] = []
-            for pd in range(1, max_pd + 1):
-                if pd in pooh_by_player_pd.get(k, {}):
-                    v = int(pooh_by_player_pd[k][pd])
-                    pd_vals.append(v)
-                    total_pooh += v
-                    played_pd_count += 1
-                else:
-                    pd_vals.append(None)
+            games, mins, pts, reb, ast, stl, blk, to = agg.get(k, EMPTY_AGG)
+
+            pd_vals = pd_vals_by_key.get(k, no_pd_vals)
+            played = [v for v in pd_vals if v is not None]
+            played_pd_count = len(played)
+            total_pooh = sum(played)
 
             avg_pooh = (total_pooh / played_pd_count) if played_pd_count > 0 else 0.0
 
-            min_g = per_game(float(g.get("min", 0.0)), games)
-            ppg   = per_game(float(g.get("pts", 0)), games)
-            rpg   = per_game(float(g.get("reb", 0)), games)
-            apg   = per_game(float(g.get("ast", 0)), games)
-            bpg   = per_game(float(g.get("blk", 0)), games)
-            spg   = per_game(float(g.get("stl", 0)), games)
-            tpg   = per_game(float(g.get("to", 0)), games)
-
-            row = {
-                "__key": k,
-                "Team Name": team_name,
-                "Name": info.get("Name", ""),
-                "Draft Order": info.get("Draft Order", ""),
-                "Cost": info.get("Cost", ""),
-                "Team": info.get("Team", ""),
-                "Position": info.get("Position", ""),
-                "Height": info.get("Height", ""),
-                "Weight": info.get("Weight", ""),
-                "Class": info.get("Class", ""),
-                "Min/G": f"{min_g:.1f}" if games > 0 else "",
-                "Total": str(total_pooh) if played_pd_count > 0 else "0",
-                "Avg": f"{avg_pooh:.2f}" if played_pd_count > 0 else "0.00",
-                "PPG": f"{ppg:.1f}" if games > 0 else "",
-                "R/G": f"{rpg:.1f}" if games > 0 else "",
-                "A/G": f"{apg:.1f}" if games > 0 else "",
-                "B/G": f"{bpg:.1f}" if games > 0 else "",
-                "S/G": f"{spg:.1f}" if games > 0 else "",
-                "T/G": f"{tpg:.1f}" if games > 0 else "",
-            }
-
-            for pd in range(1, max_pd + 1):
-                v = pd_vals[pd - 1]
-                row[str(pd)] = "" if v is None else str(v)
+            min_g = per_game(float(mins), games)
+            ppg   = per_game(float(pts), games)
+            rpg   = per_game(float(reb), games)
+            apg   = per_game(float(ast), games)
+            bpg   = per_game(float(blk), games)
+            spg   = per_game(float(stl), games)
+            tpg   = per_game(float(to), games)
+
+            name = info.get("Name", "")
+            avg_txt = f"{avg_pooh:.2f}" if played_pd_count > 0 else "0.00"
+
+            # same order as cols: fixed_cols, then one per PD, then tail_cols
+            row = [
+                team_name,
+                name,
+                info.get("Draft Order", ""),
+                info.get("Cost", ""),
+                info.get("Team", ""),
+                info.get("Position", ""),
+                info.get("Height", ""),
+                info.get("Weight", ""),
+                info.get("Class", ""),
+                f"{min_g:.1f}" if games > 0 else "",
+                str(total_pooh) if played_pd_count > 0 else "0",
+                avg_txt,
+            ]
+            row.extend("" if v is None else str(v) for v in pd_vals)
+            row.extend((f"{x:.1f}" if games > 0 else "") for x in (ppg, rpg, apg, bpg, spg, tpg))
 
             rows_out.append(row)
+            avg_keys.append(float(avg_txt))  # sort on the displayed (2dp) average
+            total_keys.append(total_pooh)
+            name_keys.append(name)
 
-        rows_out.sort(key=lambda r: (-safe_float(r.get("Avg", 0)), -safe_int(r.get("Total", 0)), r.get("Name", "")))
+        order = sorted(range(len(rows_out)), key=lambda i: (-avg_keys[i], -total_keys[i], name_keys[i]))
+        rows_sorted = [rows_out[i] for i in order]
+        row_keys = [player_keys[i] for i in order]
 
         actual_pd: Dict[int, int] = {}
         for pd in range(1, max_pd + 1):
             actual_pd[pd] = int(actual_by_owner_pd.get(owner_old, {}).get(pd, 0))
         total_actual = sum(actual_pd.values())
 
+        played_keys = [(pd_vals_by_key[k], pos_class_by_key[k]) for k in player_keys if k in pd_vals_by_key]
         max_pd_sums: Dict[int, int] = {}
         for pd in range(1, max_pd + 1):
-            items: List[Tuple[int, str]] = []
-            for k in player_keys:
-                if pd not in pooh_by_player_pd.get(k, {}):
-                    continue
-                pooh = int(pooh_by_player_pd[k][pd])
-                pos_class = classify_pos(rosters.get(k, {}).get("Position", ""))
-                items.append((pooh, pos_class))
+            i = pd - 1
+            items: List[Tuple[int, str]] = [(vals[i], pc) for vals, pc in played_keys if vals[i] is not None]
             max_pd_sums[pd] = best_valid_lineup_sum(items)
 
         total_max = sum(max_pd_sums.values())
@@ -586,14 +799,35 @@ def main():
         write_team_page(
             out_path=out_path,
             team_title=team_title,
-            cols=cols,
-            rows=rows_out,
-            pd_highlight_cells=pd_highlight_cells,
+            col_plan=col_plan,
+            rows=rows_sorted,
+            row_keys=row_keys,
+            starter_keys_by_pd=starter_keys_by_pd,
             actual_pd=actual_pd,
             max_pd_sums=max_pd_sums,
             total_actual=total_actual,
             total_max=total_max,
         )
+        return out_path
+
+    # Owners whose team names sanitize to the same file (e.g. "Team A" and "Team_A") must never be
+    # written by two threads at once, so group owners by output path; each group is written in
+    # owner order by one task, and the last owner wins as it did when pages were written serially.
+    owners_by_path: Dict[str, List[str]] = defaultdict(list)
+    for owner_old in players_by_owner:
+        team_name = display_team_name(owner_old, team_map)
+        owners_by_path[os.path.join(OUT_DIR, sanitize_team_filename(team_name))].append(owner_old)
+
+    def build_and_write_group(owners: List[str]) -> List[str]:
+        return [build_and_write_team(owner_old, players_by_owner[owner_old]) for owner_old in owners]
+
+    # Each team page only reads the shared data above, so build/write the groups concurrently
+    with ThreadPoolExecutor(max_workers=max(1, min(8, len(owners_by_path)))) as ex:
+        written = [p for paths in ex.map(build_and_write_group, owners_by_path.values()) for p in paths]
+
+    # one summary at the end (in owner order, colliding owners grouped) rather than a print per page
+    # from the worker threads
+    print("Wrote:\n  " + "\n  ".join(written))
 
 
 if __name__ == "__main__":